@@ -129,6 +129,8 @@ class Conda(object):
             None
         )  # type: Optional[subprocess.Popen[bytes]]
 
+        self._cached_default_pypi_sources = None  # type: Optional[List[str]]
+
         self._found_binaries = False  # We delay resolving binaries until we need them
         # because in the remote case, in conda_environment.py
         # we create this object but don't use it.
@@ -189,12 +191,20 @@ class Conda(object):
         # conda lock. This is, for now, used to get authentication values so we should
         # be ok relying on the pypi repo. We also provide a side mechanism to specify
         # other authentication values so we don't need to worry too much here.
+        #
+        # Computing this spawns a `pip config list` subprocess and the pip
+        # configuration does not change underneath us so we only do it once
+        # per Conda object; we return a copy since callers may extend the list.
+        if self._cached_default_pypi_sources is not None:
+            return list(self._cached_default_pypi_sources)
+
         sources = []  # type: List[str]
         if not self._found_binaries:
             self._find_conda_binary()
 
         if "pip" not in self._bins:
-            return sources
+            self._cached_default_pypi_sources = sources
+            return list(sources)
 
         config_values = self.call_binary(["config", "list"], binary="pip").decode(
             encoding="utf-8"
@@ -219,7 +229,8 @@ class Conda(object):
                 )
         if not have_index:
             sources = ["https://pypi.org/simple"] + sources[1:]
-        return sources
+        self._cached_default_pypi_sources = sources
+        return list(sources)
 
     @property
     def virtual_packages(self) -> Dict[str, str]:
@@ -7,12 +7,22 @@ from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 from metaflow.metaflow_environment import InvalidEnvironmentException
 from metaflow.unbounded_foreach import UBF_CONTROL, UBF_TASK
 
-from metaflow._vendor.packaging.utils import canonicalize_version
+from .utils import canonicalize_version_fast, merge_dep_dicts
 
-from .utils import merge_dep_dicts
+# Deprecated attributes for the conda/pypi decorators (both the step and flow
+# level ones); used to warn users to move to @named_env/@pypi
+CONDA_DEPRECATED_ATTRS = frozenset(
+    ("pip_packages", "pip_sources", "fetch_at_exec", "name", "pathspec")
+)
+PYPI_DEPRECATED_ATTRS = frozenset(("sources", "fetch_at_exec", "name", "pathspec"))
+
+# Sentinel for memoized values that can legitimately be None
+_UNSET = object()
 
 
 class StepRequirementIface:
+    __slots__ = ()
+
     @property
     def from_name(self) -> Optional[str]:
         return None
@@ -52,20 +62,42 @@ class StepRequirementMixin(StepRequirementIface):
 
     @property
     def is_disabled(self) -> Optional[bool]:
-        if self.attributes["disabled"] is None:
-            if (
-                self.python
-                or self.from_name
-                or self.from_pathspec
-                or self.packages
-                or self.sources
-            ):
-                return False
-            return None
-        return self.attributes["disabled"]
+        # Decorator attributes are frozen after parsing so the result never
+        # changes for a given instance; packages/sources can be costly to
+        # rebuild so we only compute this once
+        cached = getattr(self, "_cached_is_disabled", _UNSET)
+        if cached is _UNSET:
+            if self.attributes["disabled"] is None:
+                if (
+                    self.python
+                    or self.from_name
+                    or self.from_pathspec
+                    or self.packages
+                    or self.sources
+                ):
+                    cached = False
+                else:
+                    cached = None
+            else:
+                cached = self.attributes["disabled"]
+            self._cached_is_disabled = cached
+        return cast(Optional[bool], cached)
 
 
 class StepRequirement(StepRequirementIface):
+    # One StepRequirement exists per decorator per step during resolution;
+    # slots keep them compact and catch typos on the private fields
+    __slots__ = (
+        "_name",
+        "_pathspec",
+        "_python",
+        "_fetch_at_exec",
+        "_disabled",
+        "_packages",
+        "_sources",
+        "_default_disabled",
+    )
+
     def __init__(self):
         self._name = None  # type: Optional[str]
         self._pathspec = None  # type: Optional[str]
@@ -120,14 +152,17 @@ class StepRequirement(StepRequirementIface):
 
     @property
     def is_disabled(self) -> Optional[bool]:
+        # NOTE: We look at the underlying attributes directly (and not the
+        # packages/sources properties) as we only need truthiness and the
+        # properties return defensive deep copies.
         if self._disabled is None:
             if (
-                self.python
-                or self.from_name
-                or self.from_pathspec
-                or self.packages
-                or self.sources
-                or self.is_fetch_at_exec
+                self._python
+                or self._name
+                or self._pathspec
+                or self._packages
+                or self._sources
+                or self._fetch_at_exec
             ):
                 return False
             return None
@@ -139,12 +174,12 @@ class StepRequirement(StepRequirementIface):
 
     @property
     def packages_as_str(self) -> Dict[str, List[str]]:
-        result = {}  # type: Dict[str, List[str]]
-        for category, values in self.packages.items():
-            result[category] = [
-                "%s==%s" % (k, v) if v else k for k, v in values.items()
-            ]
-        return result
+        # Iterate over _packages directly -- we build new strings out of it so
+        # there is no need for the deep copy the packages property makes
+        return {
+            category: ["%s==%s" % (k, v) if v else k for k, v in values.items()]
+            for category, values in self._packages.items()
+        }
 
     @packages.setter
     def packages(self, value: Dict[str, Dict[str, str]]):
@@ -162,20 +197,22 @@ class StepRequirement(StepRequirementIface):
         return self._default_disabled[ubf_context]
 
     def __repr__(self) -> str:
-        disabled_part = (
-            "disabled=%s" % self.is_disabled if self.is_disabled is not None else ""
-        )
-        if self.is_disabled:
+        # Bind the properties once -- packages/sources in particular return a
+        # deep copy on every access
+        is_disabled = self.is_disabled
+        disabled_part = "disabled=%s" % is_disabled if is_disabled is not None else ""
+        if is_disabled:
             return "StepReq[%s]" % disabled_part
-        python_part = "python=%s" % self.python if self.python else ""
+        python = self.python
+        python_part = "python=%s" % python if python else ""
+        fetch_at_exec = self.is_fetch_at_exec
         fetch_at_exec_part = (
-            "fetch_at_exec=%s" % self.is_fetch_at_exec
-            if self.is_fetch_at_exec is not None
-            else ""
+            "fetch_at_exec=%s" % fetch_at_exec if fetch_at_exec is not None else ""
         )
-        from_env_part = "from=%s" % self.from_env_name if self.from_env_name else ""
-        packages_part = "packages=%s" % self.packages if self.packages else ""
-        sources_part = "sources=%s" % self.sources if self.sources else ""
+        from_env_name = self.from_env_name
+        from_env_part = "from=%s" % from_env_name if from_env_name else ""
+        packages_part = "packages=%s" % self._packages if self._packages else ""
+        sources_part = "sources=%s" % self._sources if self._sources else ""
 
         return "StepReq[%s]" % "; ".join(
             filter(
@@ -245,9 +282,13 @@ class StepRequirement(StepRequirementIface):
 
         other_sources = other.sources
         for category, sources in other_sources.items():
-            self._sources[category] = list(
-                set(sources + self._sources.get(category, []))
-            )
+            existing = self._sources.get(category)
+            if existing:
+                self._sources[category] = list(dict.fromkeys(chain(sources, existing)))
+            else:
+                # Common case: nothing to merge with so just dedup the new
+                # sources without chaining
+                self._sources[category] = list(dict.fromkeys(sources))
 
         # Special handling for pathspec/name
         if other.from_name is not None and other.from_pathspec is not None:
@@ -292,24 +333,21 @@ class CondaRequirementDecoratorMixin(StepRequirementMixin):
 
     @property
     def packages(self) -> Dict[str, Dict[str, str]]:
+        attrs = self.attributes
         return {
-            "conda": {
-                k: v
-                for k, v in cast(Dict[str, str], self.attributes["libraries"]).items()
-            },
+            "conda": dict(cast(Dict[str, str], attrs["libraries"])),
             "pypi": {
-                k: canonicalize_version(v)
-                for k, v in cast(
-                    Dict[str, str], self.attributes["pip_packages"]
-                ).items()
+                k: canonicalize_version_fast(v)
+                for k, v in cast(Dict[str, str], attrs["pip_packages"]).items()
             },
         }
 
     @property
     def sources(self) -> Dict[str, List[str]]:
+        attrs = self.attributes
         return {
-            "conda": [k for k in cast(List[str], self.attributes["channels"])],
-            "pypi": [k for k in cast(List[str], self.attributes["pip_sources"])],
+            "conda": list(cast(List[str], attrs["channels"])),
+            "pypi": list(cast(List[str], attrs["pip_sources"])),
         }
 
 
@@ -346,22 +384,34 @@ class PypiRequirementDecoratorMixin(StepRequirementMixin):
     def packages(self) -> Dict[str, Dict[str, str]]:
         return {
             "pypi": {
-                k: canonicalize_version(v)
+                k: canonicalize_version_fast(v)
                 for k, v in cast(Dict[str, str], self.attributes["packages"]).items()
             }
         }
 
     @property
     def sources(self) -> Dict[str, List[str]]:
-        return {
-            "pypi": [
-                k
-                for k in cast(
-                    List[str],
-                    chain(self.attributes["sources"], self.attributes["extra_indices"]),
+        # Decorator attributes are frozen after parsing and the merge paths do
+        # not mutate what we return so we can compute this once per instance
+        cached = getattr(self, "_cached_sources", None)
+        if cached is None:
+            # dict.fromkeys dedups in C while preserving order; the merge in
+            # StepRequirement dedups again anyway so doing it early is safe
+            cached = {
+                "pypi": list(
+                    dict.fromkeys(
+                        cast(
+                            List[str],
+                            chain(
+                                self.attributes["sources"],
+                                self.attributes["extra_indices"],
+                            ),
+                        )
+                    )
                 )
-            ]
-        }
+            }
+            self._cached_sources = cached
+        return cached
 
 
 class NamedEnvRequirementDecoratorMixin(StepRequirementMixin):
@@ -393,9 +443,4 @@ class SysPackagesRequirementDecoratorMixin(StepRequirementMixin):
 
     @property
     def packages(self) -> Dict[str, Dict[str, str]]:
-        return {
-            "sys": {
-                k: v
-                for k, v in cast(Dict[str, str], self.attributes["packages"]).items()
-            }
-        }
+        return {"sys": dict(cast(Dict[str, str], self.attributes["packages"]))}
@@ -5,6 +5,7 @@ import os
 import platform
 import re
 import tarfile
+import threading
 
 from io import BytesIO
 from itertools import chain
@@ -41,11 +42,10 @@ from metaflow.metaflow_environment import (
 
 from metaflow.unbounded_foreach import UBF_TASK
 
-from metaflow._vendor.packaging.utils import canonicalize_version
-
 from .envsresolver import EnvsResolver
 from .utils import (
     arch_id,
+    canonicalize_version_fast,
     channel_or_url,
     conda_deps_to_pypi_deps,
     get_conda_manifest_path,
@@ -66,15 +66,42 @@ from .conda import Conda
 
 from .conda_common_decorator import StepRequirement, StepRequirementMixin
 
+# Matches @{ENVVAR} references in environment names
+_ENVVAR_RE = re.compile(r"@\{(\w+)\}")
+
+# Guards the lazy initialization of CondaEnvironment._filecache
+_FILECACHE_LOCK = threading.Lock()
+
+# get_pinned_conda_libs rebuilds its dict on every call but the result only
+# depends on the python version and datastore type so we cache it here. Both
+# consumers (merge_dep_dicts and conda_deps_to_pypi_deps) build new dicts and
+# never mutate their inputs so we can hand out the cached dict directly.
+_PINNED_CONDA_LIBS_CACHE = {}  # type: Dict[Tuple[Optional[str], str], Dict[str, str]]
+
+
+def _pinned_conda_libs(python: Optional[str], datastore_type: str) -> Dict[str, str]:
+    cache_key = (python, datastore_type)
+    cached = _PINNED_CONDA_LIBS_CACHE.get(cache_key)
+    if cached is None:
+        cached = _PINNED_CONDA_LIBS_CACHE[cache_key] = get_pinned_conda_libs(
+            python, datastore_type
+        )
+    return cached
+
 
 class CondaEnvironment(MetaflowEnvironment):
     TYPE = "conda"
     _filecache = None
     _conda = None
     _flow_req = None  # type: Optional[StepRequirement]
+    _step_reqs = {}  # type: Dict[str, StepRequirement]
     _result_for_step = (
         {}
     )  # type: Dict[str, Tuple[str, StepRequirement, Optional[Tuple[EnvID, EnvType, Optional[ResolvedEnvironment]]]]]
+    # Caches the fully resolved environment ID per step so that repeated calls to
+    # get_env_id (bootstrap_commands, executable, ...) do not look up the
+    # environment again
+    _env_id_for_step = {}  # type: Dict[str, EnvID]
 
     def __init__(self, flow: FlowSpec):
         self._flow = flow
@@ -92,11 +119,11 @@ class CondaEnvironment(MetaflowEnvironment):
             # the default 'default environment'
             self.base_env = MetaflowEnvironment(self._flow)
         else:
-            self.base_env = [
+            self.base_env = next(
                 e
-                for e in ENVIRONMENTS + [MetaflowEnvironment]
+                for e in chain(ENVIRONMENTS, [MetaflowEnvironment])
                 if e.TYPE == DEFAULT_ENVIRONMENT
-            ][0](self._flow)
+            )(self._flow)
 
     def init_environment(self, echo: Callable[..., None]):
         # Print a message for now
@@ -246,9 +273,14 @@ class CondaEnvironment(MetaflowEnvironment):
     ) -> Dict[str, Any]:
         # TODO: FIX THIS: this doesn't work with the new format.
         if cls._filecache is None:
-            from metaflow.client.filecache import FileCache
-
-            cls._filecache = FileCache()
+            # Double-checked locking: the unlocked probe keeps the common case
+            # free of contention and the re-check under the lock makes sure two
+            # threads do not both build a FileCache
+            with _FILECACHE_LOCK:
+                if cls._filecache is None:
+                    from metaflow.client.filecache import FileCache
+
+                    cls._filecache = FileCache()
         info = metadata.get("code-package")
         env_id = json.loads(metadata.get("conda_env_id", "[]"))
         if info is None or not env_id:
@@ -272,10 +304,8 @@ class CondaEnvironment(MetaflowEnvironment):
                 "full_id": env_id[1],
                 "user_deps": "; ".join(map(str, resolved_env.deps)),
                 "all_packages": "; ".join(
-                    [
-                        p.filename
-                        for p in sorted(resolved_env.packages, key=lambda p: p.filename)
-                    ]
+                    p.filename
+                    for p in sorted(resolved_env.packages, key=lambda p: p.filename)
                 ),
             }
             return new_info
@@ -357,8 +387,12 @@ class CondaEnvironment(MetaflowEnvironment):
         elif step_info[2]:
             # In this case, we should know about the environment -- it will have
             # _default flag at this time
+            resolved_env_id = cls._env_id_for_step.get(step_name)
+            if resolved_env_id is not None:
+                return resolved_env_id
             resolved_env = conda.environment(step_info[2][0], local_only=True)
             if resolved_env:
+                cls._env_id_for_step[step_name] = resolved_env.env_id
                 return resolved_env.env_id
             raise RuntimeError(
                 "Cannot find environment for step '%s' -- this is a bug" % step_name
@@ -368,11 +402,13 @@ class CondaEnvironment(MetaflowEnvironment):
     def enabled_for_step(cls, step_name: str, ubf_context: str) -> bool:
         step_info = cls._result_for_step.get(step_name)
         if step_info:
-            if step_info[1].is_disabled is None:
-                if step_info[1].default_disabled(ubf_context) is None:
+            is_disabled = step_info[1].is_disabled
+            if is_disabled is None:
+                default_disabled = step_info[1].default_disabled(ubf_context)
+                if default_disabled is None:
                     return ubf_context == UBF_TASK
-                return not step_info[1].default_disabled(ubf_context)
-            return not step_info[1].is_disabled
+                return not default_disabled
+            return not is_disabled
         return os.environ.get("_METAFLOW_CONDA_ENV") is not None
 
     @classmethod
@@ -397,19 +433,21 @@ class CondaEnvironment(MetaflowEnvironment):
             return cls._flow_req.copy()
 
         cls._flow_req = StepRequirement()
-        for decos in flow._flow_decorators.values():
-            for deco in decos:
-                if isinstance(deco, StepRequirementMixin):
-                    cls._flow_req.merge_update(deco)
+        for deco in chain.from_iterable(flow._flow_decorators.values()):
+            if isinstance(deco, StepRequirementMixin):
+                cls._flow_req.merge_update(deco)
         return cls._flow_req.copy()
 
     @classmethod
     def extract_reqs_for_step(cls, step: Any) -> StepRequirement:
-        req = StepRequirement()
-        for step_deco in step.decorators:
-            if isinstance(step_deco, StepRequirementMixin):
-                req.merge_update(step_deco)
-        return req
+        req = cls._step_reqs.get(step.name)
+        if req is None:
+            req = StepRequirement()
+            for step_deco in step.decorators:
+                if isinstance(step_deco, StepRequirementMixin):
+                    req.merge_update(step_deco)
+            cls._step_reqs[step.name] = req
+        return req.copy()
 
     @classmethod
     def extract_merged_reqs_for_step(
@@ -422,7 +460,7 @@ class CondaEnvironment(MetaflowEnvironment):
         local_only: bool = False,
     ) -> Tuple[EnvType, str, StepRequirement, Optional[ResolvedEnvironment]]:
         computed_result = cls._result_for_step.get(step.name)
-        if computed_result:
+        if computed_result is not None:
             if computed_result[2] is None:
                 # Disabled or fetch_at_exec
                 return EnvType.CONDA_ONLY, computed_result[0], computed_result[1], None
@@ -435,16 +473,13 @@ class CondaEnvironment(MetaflowEnvironment):
 
         # First figure out the architecture for this step as well as if a GPU
         # is needed (to inject the proper __cuda dependency)
-        resources_deco = [
-            deco
-            for deco in step.decorators
-            if deco.name in ("resources", *CONDA_REMOTE_COMMANDS)
-        ]
         step_is_remote = False
         step_gpu_requested = False
-        for deco in resources_deco:
+        for deco in step.decorators:
             if deco.name in CONDA_REMOTE_COMMANDS:
                 step_is_remote = True
+            elif deco.name != "resources":
+                continue
             if deco.attributes.get("gpu") not in (None, 0, "0"):
                 step_gpu_requested = True
 
@@ -483,8 +518,8 @@ class CondaEnvironment(MetaflowEnvironment):
                     "environment specified with '@named_env'" % step.name
                 )
             if (
-                any([v for v in final_req.sources.values()])
-                or any([v for v in final_req.packages.values()])
+                any(final_req.sources.values())
+                or any(final_req.packages.values())
                 or final_req.python
             ):
                 raise InvalidEnvironmentException(
@@ -551,7 +586,7 @@ class CondaEnvironment(MetaflowEnvironment):
 
             if final_req.python is None:
                 final_req.python = sanitize_python_version(platform.python_version())
-            all_packages.setdefault("conda", {})["python"] = canonicalize_version(
+            all_packages.setdefault("conda", {})["python"] = canonicalize_version_fast(
                 final_req.python
             )
 
@@ -561,13 +596,13 @@ class CondaEnvironment(MetaflowEnvironment):
             all_packages["pypi"] = merge_dep_dicts(
                 all_packages.get("pypi", {}),
                 conda_deps_to_pypi_deps(
-                    get_pinned_conda_libs(final_req.python, datastore_type)
+                    _pinned_conda_libs(final_req.python, datastore_type)
                 ),
             )
         else:
             all_packages["conda"] = merge_dep_dicts(
                 all_packages.get("conda", {}),
-                get_pinned_conda_libs(final_req.python, datastore_type),
+                _pinned_conda_libs(final_req.python, datastore_type),
             )
 
         # Add the system requirements and default channels.
@@ -579,11 +614,10 @@ class CondaEnvironment(MetaflowEnvironment):
         )
 
         # The user can specify whatever they want but we inject things they don't
-        # specify
-        final_req_sys = all_packages.setdefault("sys", {})
-        for p, v in sys_pkgs.items():
-            if p not in final_req_sys:
-                final_req_sys[p] = v
+        # specify. A single C-level merge where the user values are applied last
+        # (and so win); key order may differ from the old per-key loop but
+        # get_req_id sorts dependencies before hashing so the req ID is stable
+        all_packages["sys"] = {**sys_pkgs, **all_packages.get("sys", {})}
 
         final_req.packages = all_packages
 
@@ -649,21 +683,31 @@ class CondaEnvironment(MetaflowEnvironment):
     def sub_envvars_in_envname(
         name: str, addl_env: Optional[Dict[str, Union[str, Callable[[], str]]]] = None
     ) -> str:
+        # Most environment names contain no @{ENVVAR} reference at all; bail
+        # out before setting up the regex substitution machinery
+        if "@{" not in name:
+            return name
         if addl_env is None:
             addl_env = {}
-        envvars_to_sub = re.findall(r"\@{(\w+)}", name)
-        for envvar in set(envvars_to_sub):
-            replacement = os.environ.get(envvar, addl_env.get(envvar))
-            if callable(replacement):
-                replacement = replacement()
-            if replacement is not None:
-                name = name.replace("@{%s}" % envvar, replacement)
-            else:
-                raise InvalidEnvironmentException(
-                    "Could not find '%s' in the environment -- needed to resolve '%s'"
-                    % (envvar, name)
-                )
-        return name
+        resolved = {}  # type: Dict[str, str]
+
+        def _resolve(match):
+            # type: (Any) -> str
+            envvar = match.group(1)
+            replacement = resolved.get(envvar)
+            if replacement is None:
+                replacement = os.environ.get(envvar, addl_env.get(envvar))
+                if callable(replacement):
+                    replacement = replacement()
+                if replacement is None:
+                    raise InvalidEnvironmentException(
+                        "Could not find '%s' in the environment -- needed to resolve '%s'"
+                        % (envvar, name)
+                    )
+                resolved[envvar] = replacement
+            return replacement
+
+        return _ENVVAR_RE.sub(_resolve, name)
 
     def _get_executable(self, step_name: str) -> Optional[str]:
         env_id = self.get_env_id_noconda(step_name)
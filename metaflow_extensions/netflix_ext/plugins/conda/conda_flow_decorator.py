@@ -4,6 +4,8 @@ from metaflow.decorators import FlowDecorator
 from metaflow.metaflow_environment import InvalidEnvironmentException
 
 from .conda_common_decorator import (
+    CONDA_DEPRECATED_ATTRS,
+    PYPI_DEPRECATED_ATTRS,
     CondaRequirementDecoratorMixin,
     NamedEnvRequirementDecoratorMixin,
     SysPackagesRequirementDecoratorMixin,
@@ -14,6 +16,15 @@ from .conda_common_decorator import (
 class PackageRequirementFlowDecorator(FlowDecorator):
     name = "package_base"
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Decorator copies `defaults` shallowly so dict/list default values
+        # end up shared by every instance of the decorator; give each instance
+        # its own copy so mutating one cannot leak into other flows
+        for k, v in self.attributes.items():
+            if isinstance(v, (dict, list)) and v is self.defaults.get(k):
+                self.attributes[k] = v.copy()
+
     def flow_init(
         self, flow, graph, environment, flow_datastore, metadata, logger, echo, options
     ):
@@ -79,9 +90,9 @@ class CondaRequirementFlowDecorator(
     def flow_init(
         self, flow, graph, environment, flow_datastore, metadata, logger, echo, options
     ):
-        deprecated_keys = set(
-            ("pip_packages", "pip_sources", "fetch_at_exec", "name", "pathspec")
-        ).intersection((k for k, v in self.attributes.items() if v))
+        deprecated_keys = CONDA_DEPRECATED_ATTRS.intersection(
+            k for k, v in self.attributes.items() if v
+        )
 
         if deprecated_keys:
             echo(
@@ -142,9 +153,9 @@ class PypiRequirementFlowDecorator(
     def flow_init(
         self, flow, graph, environment, flow_datastore, metadata, logger, echo, options
     ):
-        deprecated_keys = set(
-            ("sources", "fetch_at_exec", "name", "pathspec")
-        ).intersection((k for k, v in self.attributes.items() if v))
+        deprecated_keys = PYPI_DEPRECATED_ATTRS.intersection(
+            k for k, v in self.attributes.items() if v
+        )
 
         if deprecated_keys:
             echo(
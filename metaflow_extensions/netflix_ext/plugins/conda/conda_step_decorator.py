@@ -1,6 +1,6 @@
 # pyright: strict, reportTypeCommentUsage=false, reportMissingTypeStubs=false
 
-import importlib
+import importlib.util
 import json
 import os
 import shutil
@@ -41,6 +41,8 @@ from .utils import arch_id
 
 
 from .conda_common_decorator import (
+    CONDA_DEPRECATED_ATTRS,
+    PYPI_DEPRECATED_ATTRS,
     CondaRequirementDecoratorMixin,
     NamedEnvRequirementDecoratorMixin,
     PypiRequirementDecoratorMixin,
@@ -52,6 +54,15 @@ from .conda import Conda
 class PackageRequirementStepDecorator(StepDecorator):
     name = "step_package_req"
 
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # Decorator copies `defaults` shallowly so dict/list default values
+        # end up shared by every instance of the decorator; give each instance
+        # its own copy so mutating one cannot leak into other steps
+        for k, v in self.attributes.items():
+            if isinstance(v, (dict, list)) and v is self.defaults.get(k):
+                self.attributes[k] = v.copy()
+
     def step_init(
         self,
         flow: FlowSpec,
@@ -138,9 +149,9 @@ class CondaRequirementStepDecorator(
         flow_datastore: FlowDataStore,
         logger: Callable[..., None],
     ):
-        deprecated_keys = set(
-            ("pip_packages", "pip_sources", "fetch_at_exec", "name", "pathspec")
-        ).intersection((k for k, v in self.attributes.items() if v))
+        deprecated_keys = CONDA_DEPRECATED_ATTRS.intersection(
+            k for k, v in self.attributes.items() if v
+        )
         if deprecated_keys:
             logger(
                 "*DEPRECATED*: Using '%s' in '@%s' is deprecated. Please use '@pypi' or "
@@ -213,9 +224,9 @@ class PypiRequirementStepDecorator(
         flow_datastore: FlowDataStore,
         logger: Callable[..., None],
     ):
-        deprecated_keys = set(
-            ("sources", "fetch_at_exec", "name", "pathspec")
-        ).intersection((k for k, v in self.attributes.items() if v))
+        deprecated_keys = PYPI_DEPRECATED_ATTRS.intersection(
+            k for k, v in self.attributes.items() if v
+        )
 
         if deprecated_keys:
             logger(
@@ -377,7 +388,7 @@ class CondaEnvInternalDecorator(StepDecorator):
 
         self._env_id = None  # type: Optional[EnvID]
 
-        self._is_remote = any([d.name in CONDA_REMOTE_COMMANDS for d in decorators])
+        self._is_remote = any(d.name in CONDA_REMOTE_COMMANDS for d in decorators)
 
         os.environ["PYTHONNOUSERSITE"] = "1"
 
@@ -390,10 +401,12 @@ class CondaEnvInternalDecorator(StepDecorator):
         os.symlink(path_to_metaflow, os.path.join(self._metaflow_home, "metaflow"))
 
         # Symlink the INFO file as well to properly propagate down the Metaflow version
-        # if launching on AWS Batch for example
-        if os.path.isfile(path_to_info):
-            os.symlink(path_to_info, os.path.join(self._metaflow_home, "INFO"))
-        else:
+        # if launching on AWS Batch for example. Note that symlinking would succeed
+        # even for a missing INFO file (the link would just dangle) so we still need
+        # to probe for it; a single stat call is enough though.
+        try:
+            os.stat(path_to_info)
+        except FileNotFoundError:
             # If there is no "INFO" file, we will actually create one in this new
             # place because we won't be able to properly resolve the EXT_PKG extensions
             # the same way as outside conda (looking at distributions, etc). In a
@@ -403,21 +416,26 @@ class CondaEnvInternalDecorator(StepDecorator):
             with open(
                 os.path.join(self._metaflow_home, "INFO"), mode="wt", encoding="utf-8"
             ) as f:
-                f.write(
-                    json.dumps(self._env.get_environment_info(include_ext_info=True))
+                json.dump(
+                    self._env.get_environment_info(include_ext_info=True),
+                    f,
+                    separators=(",", ":"),
                 )
+        else:
+            os.symlink(path_to_info, os.path.join(self._metaflow_home, "INFO"))
 
-        # Do the same for EXT_PKG
+        # Do the same for EXT_PKG. We use find_spec to get the package's paths
+        # without having to actually import (and execute) the package.
         try:
-            m = importlib.import_module(EXT_PKG)
+            spec = importlib.util.find_spec(EXT_PKG)
         except ImportError:
             # No additional check needed because if we are here, we already checked
             # for other issues when loading at the toplevel
-            pass
-        else:
-            custom_paths = list(set(m.__path__))  # For some reason, at times, unique
-            # paths appear multiple times. We simplify
-            # to avoid un-necessary links
+            spec = None
+        if spec is not None and spec.submodule_search_locations:
+            custom_paths = list(dict.fromkeys(spec.submodule_search_locations))
+            # For some reason, at times, unique paths appear multiple times.
+            # We simplify to avoid un-necessary links
 
             if len(custom_paths) == 1:
                 # Regular package; we take a quick shortcut here
@@ -431,11 +449,14 @@ class CondaEnvInternalDecorator(StepDecorator):
                 # to the PYTHONPATH for the interpreter. Note that we don't symlink
                 # to the parent of the package because that could end up including
                 # more stuff we don't want
+                # self._metaflow_home is private to us so we can use deterministic
+                # names instead of paying for mkdtemp's unique-name retries
                 self._addl_paths = []
-                for p in custom_paths:
-                    temp_dir = tempfile.mkdtemp(dir=self._metaflow_home)
-                    os.symlink(p, os.path.join(temp_dir, EXT_PKG))
-                    self._addl_paths.append(temp_dir)
+                for idx, p in enumerate(custom_paths):
+                    link_dir = os.path.join(self._metaflow_home, "ns_%d" % idx)
+                    os.mkdir(link_dir)
+                    os.symlink(p, os.path.join(link_dir, EXT_PKG))
+                    self._addl_paths.append(link_dir)
 
         # Also install any environment escape overrides directly here to enable
         # the escape to work even in non metaflow-created subprocesses
@@ -469,10 +490,8 @@ class CondaEnvInternalDecorator(StepDecorator):
                 for var, _ in self._flow._get_parameters():
                     self._env_for_fetch[
                         "METAFLOW_INIT_%s" % var.upper().replace("-", "_")
-                    ] = lambda _param=getattr(
-                        self._flow, var
-                    ), _var=var, _ds=parent_ds: str(
-                        _param.load_parameter(_ds[_var])
+                    ] = self._make_parameter_resolver(
+                        getattr(self._flow, var), var, parent_ds
                     )
                 self._env_for_fetch["METAFLOW_TASK_ID"] = task_id
 
@@ -505,7 +524,9 @@ class CondaEnvInternalDecorator(StepDecorator):
         # we want to pass down the environment variable for the mapper tasks.
         if self._is_enabled(UBF_TASK):
             cli_args.env["_METAFLOW_CONDA_ENV"] = json.dumps(self._env_id)
-            if self._is_remote or not self._is_enabled(ubf_context):
+            if self._is_remote or (
+                ubf_context != UBF_TASK and not self._is_enabled(ubf_context)
+            ):
                 # If we are executing remotely, we don't need to actually create the
                 # environment at all. We also don't create it if we are local and
                 # this is not enabled for the current UBF context.
@@ -521,23 +542,24 @@ class CondaEnvInternalDecorator(StepDecorator):
 
         # Create the environment only if executing locally (ie: not self._is_remote)
         conda = cast(Conda, self._env.conda)
-        assert self._env_id
+        env_id = self._env_id
+        assert env_id
         entrypoint = None  # type: Optional[str]
         # Create the environment we are going to use
-        existing_env_info = conda.created_environment(self._env_id)
+        existing_env_info = conda.created_environment(env_id)
         if existing_env_info:
             self._echo(
                 "Using existing Conda environment %s (%s)"
-                % (self._env_id.req_id, self._env_id.full_id)
+                % (env_id.req_id, env_id.full_id)
             )
             entrypoint = os.path.join(existing_env_info[1], "bin", "python")
         else:
             # Otherwise, we read the conda file and create the environment locally
             self._echo(
                 "Creating Conda environment %s (%s)..."
-                % (self._env_id.req_id, self._env_id.full_id)
+                % (env_id.req_id, env_id.full_id)
             )
-            resolved_env = conda.environment(self._env_id)
+            resolved_env = conda.environment(env_id)
             if resolved_env:
                 entrypoint = os.path.join(
                     conda.create_for_step(self._step_name, resolved_env),
@@ -615,6 +637,21 @@ class CondaEnvInternalDecorator(StepDecorator):
     def runtime_finished(self, exception: Exception):
         shutil.rmtree(self._metaflow_home)
 
+    @staticmethod
+    def _make_parameter_resolver(
+        param: Any, var: str, ds: TaskDataStore
+    ) -> Callable[[], str]:
+        # Loading a parameter hits the datastore so we make sure to only do it
+        # once per parameter even if the environment name is resolved several times
+        cached = []  # type: List[str]
+
+        def _resolve() -> str:
+            if not cached:
+                cached.append(str(param.load_parameter(ds[var])))
+            return cached[0]
+
+        return _resolve
+
     def _is_enabled(self, ubf_context: str = UBF_TASK) -> bool:
         return CondaEnvironment.enabled_for_step(self._step_name, ubf_context)
 
@@ -4,6 +4,7 @@ import errno
 import fcntl
 import json
 import os
+import sys
 from enum import Enum
 from hashlib import md5, sha1, sha256
 from itertools import chain
@@ -59,11 +60,17 @@ class EnvType(Enum):
 
 
 class TStr:
+    # Thousands of TStr objects are created when (de)serializing resolved
+    # environments; slots avoid a per-instance __dict__
+    __slots__ = ("_category", "_value")
+
     def __init__(self, category: str, value: str):
         if category == "pip":
             # Legacy support for "pip" packages (now called pypi)
             category = "pypi"
-        self._category = category
+        # Categories come from a tiny fixed set ("conda", "pypi", "sys", ...) and
+        # are hashed/compared over and over when computing req IDs so intern them
+        self._category = sys.intern(category)
         self._value = value
 
     @property
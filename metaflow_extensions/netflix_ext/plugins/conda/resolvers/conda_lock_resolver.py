@@ -94,7 +94,7 @@ class CondaLockResolver(Resolver):
                 k: v for d in deps.get("sys", []) for k, v in [d.split("==")]
             }
             # We only add pip if not present
-            if not any([(d == "pip" or d.startswith("pip==")) for d in conda_deps]):
+            if not any(d == "pip" or d.startswith("pip==") for d in conda_deps):
                 conda_deps.append("pip")
             toml_lines = [
                 "[build-system]\n",
@@ -128,7 +128,7 @@ class CondaLockResolver(Resolver):
             toml_lines.append("\n")
             # TODO: Maybe we can make this better and only relax if :: is for channels
             # that don't exist in the list
-            if any(["::" in d for d in conda_deps]) or have_extra_channels:
+            if any("::" in d for d in conda_deps) or have_extra_channels:
                 addl_env = {"CONDA_CHANNEL_PRIORITY": "flexible"}
             else:
                 addl_env = {}
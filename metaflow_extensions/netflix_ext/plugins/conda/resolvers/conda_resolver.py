@@ -58,7 +58,7 @@ class CondaResolver(Resolver):
                 args.extend(["-c", c])
 
             if not have_channels:
-                have_channels = any(["::" in d for d in real_deps])
+                have_channels = any("::" in d for d in real_deps)
             args.extend(real_deps)
 
             addl_env = {
@@ -40,7 +40,11 @@ from metaflow._vendor.packaging.tags import (
     Tag,
 )
 
-from metaflow._vendor.packaging.utils import BuildTag, parse_wheel_filename
+from metaflow._vendor.packaging.utils import (
+    BuildTag,
+    canonicalize_version,
+    parse_wheel_filename,
+)
 
 from metaflow._vendor.packaging.version import Version
 from metaflow._vendor.packaging.requirements import Requirement
@@ -106,7 +110,7 @@ class CondaException(MetaflowException):
 
     def __init__(self, error: Union[Sequence[Exception], str]):
         if isinstance(error, list):
-            error = "\n".join([str(x) for x in error])
+            error = "\n".join(str(x) for x in error)
         super(CondaException, self).__init__(error)  # type: ignore
 
 
@@ -441,13 +445,20 @@ def is_alias_mutable(alias_type: AliasType, resolved_alias: str) -> bool:
     return len(splits) == 2 and splits[1] in ("latest", "candidate", "stable")
 
 
+# Set on first use by dict_to_tstr -- we cannot import TStr at the top of this
+# module (circular import) but we also don't want to re-enter the import system
+# on every call
+_TSTR_CLASS = None  # type: Optional[Any]
+
+
 def dict_to_tstr(deps: Dict[str, List[str]]) -> List[TStr]:
-    from .env_descr import TStr  # Avoid circular import
+    global _TSTR_CLASS
+    if _TSTR_CLASS is None:
+        from .env_descr import TStr as _TSTR_CLASS  # Avoid circular import
 
-    result = []  # type: List[TStr]
-    for category, values in deps.items():
-        result.extend([TStr(category, v) for v in values])
-    return result
+    return [
+        _TSTR_CLASS(category, v) for category, values in deps.items() for v in values
+    ]
 
 
 def tstr_to_dict(deps: List[TStr]) -> Dict[str, List[str]]:
@@ -478,17 +489,17 @@ def merge_dep_dicts(
     # anything in d1 but only return things that are in d2. This is used to compute
     # the new set of dependencies introduced by the user.
     result = {}  # type: Dict[str, str]
-    for key in set(d2.keys() if only_last_deps else chain(d1.keys(), d2.keys())):
+    for key in set(d2) if only_last_deps else {*d1, *d2}:
         v1 = [v for v in d1.get(key, "").split(",") if v]
         v2 = [v for v in d2.get(key, "").split(",") if v]
-        sv1 = set([v.lstrip("=") for v in v1])
+        sv1 = {v.lstrip("=") for v in v1}
         # We dedup so that if we have the exact same constraints, we don't change
         # things. We try to keep the order of the first dict
         v2 = [v for v in v2 if v.lstrip("=") not in sv1]
 
         # We need to make sure that things that don't start with ~, <, >, ! or = get
         # == if they are not first.
-        resulting_versions = list(chain(v1, v2))
+        resulting_versions = v1 + v2
         if resulting_versions:
             resulting_versions = [resulting_versions[0]] + [
                 v if v[0] in ("~", "<", ">", "!", "=") else "==%s" % v
@@ -554,6 +565,21 @@ def conda_deps_to_pypi_deps(d: Dict[str, str]) -> Dict[str, str]:
     return r
 
 
+# Matches plain release versions like "3", "3.10" or "3.10.12" (no leading zeros
+# in a segment and at most 4 segments)
+_PLAIN_VERSION_REGEX = re.compile(r"^(?:0|[1-9]\d*)(?:\.(?:0|[1-9]\d*)){0,3}$")
+
+
+def canonicalize_version_fast(version: str) -> str:
+    # Fast path for the common case of an exact version like "3.10.12":
+    # canonicalize_version would run a full PEP 440 parse just to return the
+    # input unchanged. We only take the shortcut if there is no trailing ".0"
+    # (which canonicalize_version strips).
+    if _PLAIN_VERSION_REGEX.match(version) and not version.endswith(".0"):
+        return version
+    return canonicalize_version(version)
+
+
 _UNDERSCORE_REGEX = re.compile(r"[-_.]+")
 
 
@@ -802,15 +828,10 @@ def hash_directory(path: str) -> str:
     for directory, dirs, files in os.walk(path):
         if top_level:
             # Skip build and .egg-info since we don't want them to affect the
-            # last modified file (it's not source)
-            to_remove = []  # type: List[str]
-            for d in dirs:
-                if d == "build":
-                    to_remove.append(d)
-                if d.endswith(".egg-info"):
-                    to_remove.append(d)
-            for d in to_remove:
-                dirs.remove(d)
+            # last modified file (it's not source). Prune in place (os.walk
+            # honors in-place edits of dirs) in a single pass instead of
+            # collecting and then removing one by one.
+            dirs[:] = [d for d in dirs if d != "build" and not d.endswith(".egg-info")]
             top_level = False
 
         for file in files:
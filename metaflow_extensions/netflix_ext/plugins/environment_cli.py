@@ -86,7 +86,10 @@ def resolve(
     force: bool = False,
     dry_run: bool = False,
 ):
-    conda = Conda(obj.echo, obj.flow_datastore.TYPE)
+    # Hoist the datastore type out of the per-step/per-arch loop -- it is an
+    # attribute chain lookup that never changes during the command
+    datastore_type = obj.flow_datastore.TYPE
+    conda = Conda(obj.echo, datastore_type)
     resolver = EnvsResolver(conda)
     for step in obj.flow:
         if not steps_to_resolve or step.name in steps_to_resolve:
@@ -99,7 +102,7 @@ def resolve(
                 ) = CondaEnvironment.extract_merged_reqs_for_step(
                     conda,
                     obj.flow,
-                    obj.flow_datastore.TYPE,
+                    datastore_type,
                     step,
                     override_arch=resolve_arch,
                 )
@@ -203,7 +206,7 @@ def resolve(
     # If this is not a dry-run, we cache the environments and write out the resolved
     # information
     update_envs = []  # type: List[ResolvedEnvironment]
-    if obj.flow_datastore.TYPE != "local" or CONDA_TEST:
+    if datastore_type != "local" or CONDA_TEST:
         # We may need to update caches
         # Note that it is possible that something we needed to resolve, we don't need
         # to cache (if we resolved to something already cached).
@@ -245,7 +248,8 @@ def resolve(
 def show(obj: Any, local_only: bool, steps_to_show: Tuple[str]):
     # Goes from step_name to information about the step
     result = {}  # type: Dict[str, Any]
-    conda = Conda(obj.echo, obj.flow_datastore.TYPE)
+    datastore_type = obj.flow_datastore.TYPE
+    conda = Conda(obj.echo, datastore_type)
     for step in obj.flow:
         if not steps_to_show or step.name in steps_to_show:
             (
@@ -254,7 +258,7 @@ def show(obj: Any, local_only: bool, steps_to_show: Tuple[str]):
                 req,
                 base_env,
             ) = CondaEnvironment.extract_merged_reqs_for_step(
-                conda, obj.flow, obj.flow_datastore.TYPE, step, local_only=local_only
+                conda, obj.flow, datastore_type, step, local_only=local_only
             )
             from_name = req.from_env_name
             result[step.name] = {"req": req}
@@ -284,7 +288,7 @@ def show(obj: Any, local_only: bool, steps_to_show: Tuple[str]):
                     result[step.name]["state"].append("resolved")
 
                     if (
-                        obj.flow_datastore.TYPE != "local" or CONDA_TEST
+                        datastore_type != "local" or CONDA_TEST
                     ) and resolved_env.is_cached(
                         {
                             "conda": (